@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+
+from metrics_concurrent import count_active_branches_by_index, count_active_branches_by_date
+
+
+def make_fixture(branch_count, commit_count, days):
+    """Build fake commits and branches shaped like python-gitlab objects."""
+    now = datetime.now(timezone.utc)
+    commits = [SimpleNamespace(id=f"{i:040x}") for i in range(commit_count)]
+    branches = []
+    for i in range(branch_count):
+        recent = random.random() < 0.5
+        head_id = random.choice(commits).id if recent else f"{commit_count + i:040x}"
+        committed = now - timedelta(days=random.uniform(0, days) if recent else random.uniform(days + 1, 3 * 365))
+        branches.append(SimpleNamespace(name=f"branch-{i}", commit={"id": head_id, "committed_date": committed.isoformat()}))
+    return commits, branches
+
+
+def count_active_branches_by_scan(branches, commits):
+    """The previous implementation: scan every recent commit for every branch."""
+    return sum(1 for branch in branches if any(commit.id == branch.commit["id"] for commit in commits))
+
+
+def run_benchmark(branch_count, commit_count, baseline_branches, days):
+    random.seed(42)
+    commits, branches = make_fixture(branch_count, commit_count, days)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    # The linear scan is too slow to run in full; time a sample and extrapolate
+    sample = branches[:baseline_branches]
+    start = time.perf_counter()
+    count_active_branches_by_scan(sample, commits)
+    scan_s = (time.perf_counter() - start) * branch_count / len(sample)
+
+    start = time.perf_counter()
+    commit_ids = frozenset(commit.id for commit in commits)
+    index_count = count_active_branches_by_index(branches, commit_ids)
+    index_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    date_count = count_active_branches_by_date(branches, cutoff)
+    date_s = time.perf_counter() - start
+
+    print(f"Branches: {branch_count}, recent commits: {commit_count}\n")
+    print("| Method | Active branches | Time (s) |")
+    print("|--------|-----------------|----------|")
+    print(f"| Linear scan (extrapolated from {len(sample)} branches) | - | {scan_s:.3f} |")
+    print(f"| Commit ID index (incl. building the index) | {index_count} | {index_s:.3f} |")
+    print(f"| Head committed_date (no commit listing) | {date_count} | {date_s:.3f} |")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare active-branch detection strategies")
+    parser.add_argument("--branches", type=int, default=10000, help="Number of branches")
+    parser.add_argument("--commits", type=int, default=50000, help="Number of recent commits")
+    parser.add_argument("--baseline_branches", type=int, default=200, help="Branches to time with the linear scan")
+    parser.add_argument("--days", type=int, default=7, help="Activity window in days")
+    args = parser.parse_args()
+
+    run_benchmark(args.branches, args.commits, args.baseline_branches, args.days)
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+
+from analyzer_cache import AnalyzerCache
+from code_metrics import LizardTotals, stream_lizard, stream_lizard_cached
+
+C_FUNCTION = "int f{i}(int a) {{\n    if (a > {i}) {{\n        return a;\n    }}\n    return {i};\n}}\n"
+
+
+def build_repository(path, file_count):
+    """
+    Create a committed repository of C sources plus the files lizard -f would wrongly analyze:
+    C code in a README, a tracked but gitignored source, a duplicate, and a file without functions.
+    """
+    os.makedirs(os.path.join(path, "src"))
+    for i in range(file_count):
+        with open(os.path.join(path, "src", f"file_{i}.c"), "w") as f:
+            f.write(C_FUNCTION.format(i=i))
+    extras = {
+        "README.md": "Example:\n\n" + C_FUNCTION.format(i=-1),
+        "generated/parser.c": C_FUNCTION.format(i=-2),
+        "src/copy_of_file_0.c": C_FUNCTION.format(i=0),
+        "src/constants.h": "#define LIMIT 10\n",
+        ".gitignore": "generated/\n",
+    }
+    for name, content in extras.items():
+        os.makedirs(os.path.dirname(os.path.join(path, name)), exist_ok=True)
+        with open(os.path.join(path, name), "w") as f:
+            f.write(content)
+    subprocess.run(["git", "init", "-q", path], check=True)
+    subprocess.run(["git", "-C", path, "add", "-A", "-f"], check=True)
+    subprocess.run(["git", "-C", path, "-c", "user.name=Bench", "-c", "user.email=bench@example.com",
+                    "commit", "-q", "-m", "Initial"], check=True)
+
+
+def run_lizard(stream, *args, **kwargs):
+    """Return (rows sorted for comparison, summary, seconds) of one stream."""
+    totals = LizardTotals()
+    start = time.perf_counter()
+    rows = list(stream(*args, totals, **kwargs))
+    seconds = time.perf_counter() - start
+    return sorted(rows, key=lambda row: (row["file_name"], row["start_line"])), totals.summary(), seconds
+
+
+def run_benchmark(file_count):
+    work_dir = tempfile.mkdtemp(prefix="code_metrics_cache_bench_")
+    try:
+        repo_dir = os.path.join(work_dir, "repo")
+        build_repository(repo_dir, file_count)
+        cache = AnalyzerCache(os.path.join(work_dir, "cache.sqlite"))
+        # Smaller than one repository's results, so blobs are evicted while they are merged
+        tiny_cache = AnalyzerCache(os.path.join(work_dir, "tiny_cache.sqlite"), max_bytes=1024)
+
+        runs = {
+            "lizard on the directory": run_lizard(stream_lizard, repo_dir),
+            "cached, cold": run_lizard(stream_lizard_cached, repo_dir, cache=cache),
+            "cached, warm": run_lizard(stream_lizard_cached, repo_dir, cache=cache),
+            "cached, evicting": run_lizard(stream_lizard_cached, repo_dir, cache=tiny_cache),
+        }
+        baseline_rows, baseline_summary, baseline_s = runs["lizard on the directory"]
+        for name, (rows, summary, _) in runs.items():
+            if rows != baseline_rows or summary != baseline_summary:
+                raise RuntimeError(f"{name} differs from lizard on the directory:\n{baseline_summary}\n{summary}")
+
+        print(f"Files: {file_count}, functions: {len(baseline_rows)}\n")
+        print("| Method | Time (s) | Speedup |")
+        print("|--------|----------|---------|")
+        for name, (_, _, seconds) in runs.items():
+            print(f"| {name} | {seconds:.2f} | {baseline_s / seconds:.1f}x |")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check that cached Lizard runs match a full run, and time them")
+    parser.add_argument("--files", type=int, default=2000, help="Number of source files in the synthetic repository")
+    args = parser.parse_args()
+
+    run_benchmark(args.files)
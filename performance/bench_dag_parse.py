@@ -0,0 +1,76 @@
+import os
+import re
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+from airflow.models import DagBag
+
+UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils")
+DAG_FILES = ["metrics_parallel.py", "metrics_concurrent.py"]
+
+sys.path.insert(0, UTILS_DIR)
+
+
+def write_input_csv(path, row_count):
+    """Write a synthetic input_projects CSV."""
+    with open(path, "w") as f:
+        f.write("gitlab_project_url,LOB,dpt,project_name,appid,appname,gitlab_workspace\n")
+        for i in range(row_count):
+            f.write(f"https://gitlab.example.com/group/project-{i},lob,dpt,project-{i},app{i},App {i},workspace\n")
+
+
+def copy_dag_pointing_at(dag_file, csv_path, dag_folder):
+    """Copy a DAG file into dag_folder with INPUT_FILE pointing at csv_path."""
+    with open(os.path.join(UTILS_DIR, dag_file)) as f:
+        source = f.read()
+    source = re.sub(r'^INPUT_FILE = .*$', f'INPUT_FILE = "{csv_path}"', source, count=1, flags=re.M)
+    with open(os.path.join(dag_folder, dag_file), "w") as f:
+        f.write(source)
+
+
+def time_parse(dag_folder, repeats):
+    """Return the median DagBag parse time in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        dag_bag = DagBag(dag_folder=dag_folder, include_examples=False)
+        samples.append((time.perf_counter() - start) * 1000)
+        if dag_bag.import_errors:
+            raise RuntimeError(f"DAG import errors: {dag_bag.import_errors}")
+    return statistics.median(samples)
+
+
+def run_benchmark(row_counts, budget_ms, repeats):
+    work_dir = tempfile.mkdtemp(prefix="dag_parse_bench_")
+    try:
+        print(f"Parse budget: {budget_ms:.0f} ms per DAG file\n")
+        print("| DAG file | CSV rows | Parse (ms) | Within budget |")
+        print("|----------|----------|------------|---------------|")
+        over_budget = False
+        for row_count in row_counts:
+            csv_path = os.path.join(work_dir, f"input_{row_count}.csv")
+            write_input_csv(csv_path, row_count)
+            for dag_file in DAG_FILES:
+                dag_folder = tempfile.mkdtemp(dir=work_dir)
+                copy_dag_pointing_at(dag_file, csv_path, dag_folder)
+                time_parse(dag_folder, 1)  # Warm up module imports
+                parse_ms = time_parse(dag_folder, repeats)
+                within = parse_ms <= budget_ms
+                over_budget = over_budget or not within
+                print(f"| {dag_file} | {row_count} | {parse_ms:.2f} | {'yes' if within else 'NO'} |")
+        return not over_budget
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check that DAG parse time does not grow with the input CSV size")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000], help="CSV sizes to test")
+    parser.add_argument("--budget_ms", type=float, default=1000, help="Maximum parse time per DAG file")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed parses per DAG file and CSV size")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.rows, args.budget_ms, args.repeats) else 1)
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import hashlib
+import statistics
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+
+from metrics_parallel import Base, InputProject, compute_key_ranges, fetch_batch
+
+
+def seed_projects(session, row_count):
+    """Insert synthetic input_projects rows."""
+    projects = []
+    for i in range(row_count):
+        url = f"https://gitlab.example.com/group/project-{i}"
+        projects.append(InputProject(
+            id=hashlib.sha256(url.encode("utf-8")).hexdigest(),
+            gitlab_project_url=url,
+            project_name=f"project-{i}",
+        ))
+    session.bulk_save_objects(projects)
+    session.commit()
+
+
+def time_batches(fetch, batch_numbers, repeats):
+    """Return the median latency in milliseconds for each batch number."""
+    latencies = {}
+    for batch_number in batch_numbers:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fetch(batch_number)
+            samples.append((time.perf_counter() - start) * 1000)
+        latencies[batch_number] = statistics.median(samples)
+    return latencies
+
+
+def run_benchmark(db_url, row_count, batch_size, repeats):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine, tables=[InputProject.__table__])
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    try:
+        if session.query(InputProject).count() < row_count:
+            seed_projects(session, row_count)
+
+        total_batches = (row_count + batch_size - 1) // batch_size
+        batch_numbers = sorted({0, total_batches // 4, total_batches // 2, (3 * total_batches) // 4, total_batches - 1})
+
+        start = time.perf_counter()
+        key_ranges = compute_key_ranges(session, InputProject, batch_size=batch_size)
+        boundary_ms = (time.perf_counter() - start) * 1000
+
+        offset = time_batches(
+            lambda n: session.query(InputProject).offset(n * batch_size).limit(batch_size).all(),
+            batch_numbers, repeats,
+        )
+        keyset = time_batches(
+            lambda n: fetch_batch(session, InputProject, key_ranges[n]),
+            batch_numbers, repeats,
+        )
+
+        print(f"Rows: {row_count}, batch size: {batch_size}, batches: {total_batches}")
+        print(f"Key range computation (once per run): {boundary_ms:.2f} ms\n")
+        print("| Batch # | OFFSET (ms) | Keyset (ms) |")
+        print("|---------|-------------|-------------|")
+        for batch_number in batch_numbers:
+            print(f"| {batch_number} | {offset[batch_number]:.2f} | {keyset[batch_number]:.2f} |")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare per-batch latency of OFFSET and keyset batch fetching")
+    parser.add_argument("--db_url", default="sqlite://", help="Database URL to benchmark against")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of input_projects rows")
+    parser.add_argument("--batch_size", type=int, default=100, help="Rows per batch")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repetitions per batch")
+    args = parser.parse_args()
+
+    run_benchmark(args.db_url, args.rows, args.batch_size, args.repeats)
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+
+from rate_limiter import RateLimiter, mount_rate_limiter
+
+
+class FakeRateLimitedServer(ThreadingHTTPServer):
+    """Local stand-in for GitLab that allows `limit` requests per fixed `window` seconds."""
+
+    daemon_threads = True
+
+    def __init__(self, limit, window):
+        super().__init__(("127.0.0.1", 0), FakeGitLabHandler)
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.window_start = time.time()
+        self.used = 0
+
+    def take(self):
+        """Return (allowed, remaining, reset_epoch) for one request."""
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start = now
+                self.used = 0
+            reset = self.window_start + self.window
+            if self.used >= self.limit:
+                return False, 0, reset
+            self.used += 1
+            return True, self.limit - self.used, reset
+
+
+class FakeGitLabHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        allowed, remaining, reset = self.server.take()
+        body = b"[]" if allowed else b'{"message":"Retry later"}'
+        self.send_response(200 if allowed else 429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("RateLimit-Limit", str(self.server.limit))
+        self.send_header("RateLimit-Remaining", str(remaining))
+        self.send_header("RateLimit-Reset", str(int(reset)))
+        if not allowed:
+            self.send_header("Retry-After", str(max(int(reset - time.time()) + 1, 1)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def drive(url, http_session, workers, duration):
+    """Send requests from `workers` threads for `duration` seconds and count the outcomes."""
+    counts = {"ok": 0, "throttled": 0}
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def worker():
+        while time.time() < deadline:
+            response = http_session.get(url)
+            with lock:
+                counts["ok" if response.status_code == 200 else "throttled"] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def run_benchmark(limit, window, workers, duration):
+    server = FakeRateLimitedServer(limit, window)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/v4/projects"
+    state_path = os.path.join(tempfile.mkdtemp(prefix="rate_limit_bench_"), "state.json")
+
+    try:
+        print(f"Server limit: {limit} requests / {window}s ({limit / window:.1f} req/s), "
+              f"{workers} workers, {duration}s per run\n")
+        print("| Client | OK | 429s | OK req/s |")
+        print("|--------|----|------|----------|")
+        unthrottled = drive(url, requests.Session(), workers, duration)
+        print(f"| Unthrottled | {unthrottled['ok']} | {unthrottled['throttled']} | {unthrottled['ok'] / duration:.1f} |")
+
+        time.sleep(window)  # Let the server window reset
+        limiter = RateLimiter(state_path, rate=1.0, max_rate=limit)
+        limited = drive(url, mount_rate_limiter(requests.Session(), limiter, pool_size=workers), workers, duration)
+        print(f"| Rate limited | {limited['ok']} | {limited['throttled']} | {limited['ok'] / duration:.1f} |")
+        limiter.log_stats()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare an unthrottled client with the shared rate limiter against a fake rate-limited server")
+    parser.add_argument("--limit", type=int, default=100, help="Requests the fake server allows per window")
+    parser.add_argument("--window", type=int, default=10, help="Fake server rate-limit window in seconds")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--duration", type=int, default=30, help="Seconds per run")
+    args = parser.parse_args()
+
+    run_benchmark(args.limit, args.window, args.workers, args.duration)
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime
+import pytz
+from git import Repo
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+
+from bitbucket_repo_analysis import compute_repo_metrics
+
+
+def build_repository(path, commit_count, file_count, author_count):
+    """Create a repository with `commit_count` commits on main using git fast-import."""
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    start = 1_500_000_000
+    process = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=path, stdin=subprocess.PIPE)
+    for i in range(commit_count):
+        author = f"Dev {i % author_count} <dev{i % author_count}@example.com>"
+        content = f"revision {i}\n".encode()
+        message = f"Commit {i}\n".encode()
+        # fast-import continues from the branch tip it last wrote, so no "from" line is needed
+        chunks = [
+            b"commit refs/heads/main\n",
+            f"committer {author} {start + i * 60} +0000\n".encode(),
+            f"data {len(message)}\n".encode(), message,
+            f"M 644 inline src/file_{i % file_count}.txt\n".encode(),
+            f"data {len(content)}\n".encode(), content, b"\n",
+        ]
+        process.stdin.write(b"".join(chunks))
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+    subprocess.run(["git", "checkout", "-q", "main"], cwd=path, check=True)
+
+
+def compute_repo_metrics_gitpython(repo_dir):
+    """The previous implementation: four history walks and two tree walks through GitPython."""
+    repo_obj = Repo(repo_dir)
+    default_branch = repo_obj.active_branch.name
+    total_size = sum(blob.size for blob in repo_obj.tree(default_branch).traverse() if blob.type == 'blob')
+    file_count = sum(1 for blob in repo_obj.tree(default_branch).traverse() if blob.type == 'blob')
+    total_commits = sum(1 for _ in repo_obj.iter_commits(default_branch))
+    contributors = set(commit.author.email for commit in repo_obj.iter_commits(default_branch))
+    last_commit_date = max(commit.committed_datetime for commit in repo_obj.iter_commits(default_branch))
+    first_commit_date = min(commit.committed_datetime for commit in repo_obj.iter_commits(default_branch))
+    return {
+        "repo_size_bytes": total_size,
+        "file_count": file_count,
+        "total_commits": total_commits,
+        "number_of_contributors": len(contributors),
+        "last_commit_date": last_commit_date,
+        "repo_age_days": (datetime.utcnow().replace(tzinfo=pytz.utc) - first_commit_date).days,
+        "active_branch_count": len(repo_obj.branches),
+    }
+
+
+def run_benchmark(commit_count, file_count, author_count):
+    work_dir = tempfile.mkdtemp(prefix="repo_metrics_bench_")
+    try:
+        repo_dir = os.path.join(work_dir, "repo")
+        build_repository(repo_dir, commit_count, file_count, author_count)
+
+        start = time.perf_counter()
+        baseline = compute_repo_metrics_gitpython(repo_dir)
+        baseline_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        single_pass = compute_repo_metrics(repo_dir)
+        single_pass_s = time.perf_counter() - start
+
+        if baseline != single_pass:
+            raise RuntimeError(f"Metrics differ:\n{baseline}\n{single_pass}")
+
+        print(f"Commits: {commit_count}, files: {file_count}, authors: {author_count}\n")
+        print("| Method | Time (s) | Speedup |")
+        print("|--------|----------|---------|")
+        print(f"| GitPython (4 history walks, 2 tree walks) | {baseline_s:.2f} | 1.0x |")
+        print(f"| git log + git ls-tree (single pass each) | {single_pass_s:.2f} | {baseline_s / single_pass_s:.1f}x |")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare repository metric calculation strategies")
+    parser.add_argument("--commits", type=int, default=100000, help="Number of commits in the synthetic repository")
+    parser.add_argument("--files", type=int, default=5000, help="Number of files in the synthetic repository")
+    parser.add_argument("--authors", type=int, default=200, help="Number of distinct authors")
+    args = parser.parse_args()
+
+    run_benchmark(args.commits, args.files, args.authors)
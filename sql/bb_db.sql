@@ -22,9 +22,14 @@ CREATE TABLE bitbucket_repositories (
     tc VARCHAR,
     status VARCHAR,
     comment VARCHAR,
+    head_fingerprint VARCHAR,  -- Branch heads at the last successful analysis
     updated_on TIMESTAMP
 );
 
+-- Work queue for repo_processing_with_batches: workers claim NEW rows (and stale PROCESSING rows)
+CREATE INDEX IF NOT EXISTS idx_bitbucket_repositories_claimable ON bitbucket_repositories (repo_id)
+    WHERE status IN ('NEW', 'PROCESSING');
+
 CREATE TABLE go_enry_analysis (
     id SERIAL PRIMARY KEY,
     repo_id VARCHAR NOT NULL,
@@ -202,7 +207,10 @@ CREATE TABLE analysis_execution_log (
     status VARCHAR NOT NULL,
     message TEXT,
     execution_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    duration FLOAT NOT NULL
+    duration FLOAT NOT NULL,
+    cpu_time FLOAT,           -- Seconds of CPU of the stage's thread and its subprocesses
+    peak_rss_bytes BIGINT,    -- Peak RSS of the stage's largest subprocess; NULL if it ran none
+    bytes_cloned BIGINT       -- Object store growth during the clone stage
 );
 
 CREATE INDEX idx_analysis_log_method_name ON analysis_execution_log (method_name);
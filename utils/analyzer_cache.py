@@ -0,0 +1,128 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB of cached per-file results
+QUERY_CHUNK = 500  # Keys per SQL statement, below SQLite's bound-parameter limit
+
+class AnalyzerCache:
+    """
+    SQLite store of per-file analyzer results keyed by (analyzer, analyzer version, git blob
+    SHA). A blob's content never changes, so a hit is always valid for that analyzer version;
+    least recently used entries are evicted beyond max_bytes.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_results (
+                analyzer TEXT NOT NULL,
+                version TEXT NOT NULL,
+                blob_sha TEXT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (analyzer, version, blob_sha)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_file_results_last_access ON file_results (last_access)")
+        self._conn.commit()
+
+    def missing(self, analyzer, version, blob_shas):
+        """
+        Return the subset of blob_shas with no cached result, and mark the cached ones used
+        so that storing the missing results right after does not evict them.
+        """
+        blob_shas = list(set(blob_shas))
+        found = set()
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(blob_shas), QUERY_CHUNK):
+                chunk = blob_shas[i:i + QUERY_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                found.update(sha for (sha,) in self._conn.execute(
+                    f"SELECT blob_sha FROM file_results WHERE analyzer = ? AND version = ? "
+                    f"AND blob_sha IN ({placeholders})",
+                    (analyzer, version, *chunk),
+                ))
+                self._conn.execute(
+                    f"UPDATE file_results SET last_access = ? WHERE analyzer = ? AND version = ? "
+                    f"AND blob_sha IN ({placeholders})",
+                    (now, analyzer, version, *chunk),
+                )
+            self._conn.commit()
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(blob_shas) - len(found)
+        return set(blob_shas) - found
+
+    def get_many(self, analyzer, version, blob_shas):
+        """Return {blob SHA: result} for the cached blobs among blob_shas, and mark them used."""
+        blob_shas = list(set(blob_shas))
+        results = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(blob_shas), QUERY_CHUNK):
+                chunk = blob_shas[i:i + QUERY_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                results.update((sha, json.loads(result)) for sha, result in self._conn.execute(
+                    f"SELECT blob_sha, result FROM file_results WHERE analyzer = ? AND version = ? "
+                    f"AND blob_sha IN ({placeholders})",
+                    (analyzer, version, *chunk),
+                ))
+                self._conn.execute(
+                    f"UPDATE file_results SET last_access = ? WHERE analyzer = ? AND version = ? "
+                    f"AND blob_sha IN ({placeholders})",
+                    (now, analyzer, version, *chunk),
+                )
+            self._conn.commit()
+        return results
+
+    def put_many(self, analyzer, version, results):
+        """Store {blob SHA: JSON-serializable result} and evict least recently used entries beyond max_bytes."""
+        now = time.time()
+        rows = []
+        for sha, result in results.items():
+            encoded = json.dumps(result)
+            rows.append((analyzer, version, sha, encoded, len(encoded), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_results (analyzer, version, blob_sha, result, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.stats["stored"] += len(rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM file_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key in self._conn.execute(
+            "SELECT analyzer, version, blob_sha, size FROM file_results ORDER BY last_access"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append(key[:3])
+            total -= key[3]
+        self._conn.executemany(
+            "DELETE FROM file_results WHERE analyzer = ? AND version = ? AND blob_sha = ?", victims
+        )
+        self.stats["evicted"] += len(victims)
+        logger.debug(f"Evicted {len(victims)} cached file results to stay under {self.max_bytes} bytes.")
+
+    def log_stats(self):
+        """Log hit/miss counters for this process."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0
+        logger.info(f"Analyzer cache stats: {self.stats}, hit rate: {hit_rate:.1%}")
@@ -0,0 +1,170 @@
+import json
+import logging
+import signal
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from datetime import datetime
+from execution_log import timed_stage
+from process_usage import wait_measured
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 1800
+KILL_AFTER_SECONDS = 10  # Grace period between SIGTERM and SIGKILL once a tool times out
+TIMEOUT_EXIT_CODE = 124  # Exit code of coreutils `timeout` when the command timed out
+SIGNAL_EXIT_BASE = 128  # `timeout` exits with 128 + N when its command was killed by signal N
+DEADLINE_GRACE_SECONDS = 60  # How long past its timeout a function analyzer is waited for
+
+class Analyzer:
+    """
+    One analysis tool and its budget. A command analyzer is an argv builder, command(repo_path),
+    whose stdout is passed to parse; a function analyzer is func(repo_path, analyzer) and returns
+    its result itself. Every command is run through analyzer.limit_command, which wraps it in
+    `timeout`, `prlimit` (CPU seconds and address space, per process) and `nice`, so function
+    analyzers should pass the commands they run through it too.
+    """
+
+    def __init__(self, name, command=None, func=None, parse=json.loads, stage=None,
+                 timeout_seconds=DEFAULT_TIMEOUT_SECONDS, cpu_seconds=None, memory_bytes=None, nice=0,
+                 ok_returncodes=(0,)):
+        if (command is None) == (func is None):
+            raise ValueError(f"Analyzer {name} needs exactly one of command or func.")
+        self.name = name
+        self.command = command
+        self.func = func
+        self.parse = parse
+        self.stage = stage or name  # analysis_execution_log stage
+        self.timeout_seconds = timeout_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.nice = nice  # Lower CPU share under contention; 0 leaves the priority unchanged
+        self.ok_returncodes = ok_returncodes
+
+    def limit_command(self, argv):
+        prefix = ["timeout", f"--kill-after={KILL_AFTER_SECONDS}", str(self.timeout_seconds)]
+        limits = []
+        if self.cpu_seconds:
+            # SIGXCPU at the soft limit, SIGKILL at the hard one should the tool ignore it
+            limits.append(f"--cpu={self.cpu_seconds}:{self.cpu_seconds + KILL_AFTER_SECONDS}")
+        if self.memory_bytes:
+            limits.append(f"--as={self.memory_bytes}")
+        if limits:
+            prefix += ["prlimit", *limits, "--"]
+        if self.nice:
+            prefix += ["nice", "-n", str(self.nice)]
+        return [*prefix, *argv]
+
+# Analyzers available by name, e.g. for a configured list of extra tools
+ANALYZERS = {}
+
+def register_analyzer(analyzer):
+    ANALYZERS[analyzer.name] = analyzer
+    return analyzer
+
+def get_analyzers(names):
+    missing = [name for name in names if name not in ANALYZERS]
+    if missing:
+        raise KeyError(f"Unknown analyzers: {', '.join(missing)}")
+    return [ANALYZERS[name] for name in names]
+
+register_analyzer(Analyzer("trivy", command=lambda repo_path: ["trivy", "fs", "--quiet", "--format", "json", str(repo_path)]))
+register_analyzer(Analyzer("semgrep", command=lambda repo_path: ["semgrep", "scan", "--config", "p/default", "--json", "--quiet", str(repo_path)]))
+register_analyzer(Analyzer("syft", command=lambda repo_path: ["syft", f"dir:{repo_path}", "--output", "json", "--quiet"]))
+register_analyzer(Analyzer("grype", command=lambda repo_path: ["grype", f"dir:{repo_path}", "--output", "json", "--quiet"]))
+
+def exit_error(analyzer, returncode):
+    """The error message for a command of analyzer that exited with returncode, or None if that is a success."""
+    if returncode == TIMEOUT_EXIT_CODE:
+        return f"{analyzer.name} timed out after {analyzer.timeout_seconds}s"
+    if returncode < 0 or returncode > SIGNAL_EXIT_BASE:
+        number = -returncode if returncode < 0 else returncode - SIGNAL_EXIT_BASE
+        try:
+            name = signal.Signals(number).name
+        except ValueError:
+            name = f"signal {number}"
+        if number == signal.SIGXCPU:
+            return f"{analyzer.name} was killed by {name} at its CPU time limit of {analyzer.cpu_seconds}s"
+        if number == signal.SIGKILL:
+            return f"{analyzer.name} was killed by {name}, by the timeout's kill, the CPU time hard limit or the OOM killer"
+        return f"{analyzer.name} was killed by {name}"
+    if returncode not in analyzer.ok_returncodes:
+        return f"{analyzer.name} failed with exit code {returncode}"
+    return None
+
+def run_command(analyzer, repo_path):
+    """Run a command analyzer in repo_path and parse its output."""
+    with tempfile.TemporaryFile(mode="w+") as stdout, tempfile.TemporaryFile(mode="w+") as stderr:
+        process = subprocess.Popen(
+            analyzer.limit_command(analyzer.command(repo_path)),
+            cwd=str(repo_path), stdout=stdout, stderr=stderr
+        )
+        # wait4 rather than wait: its rusage covers only this tool, even with others running alongside
+        error = exit_error(analyzer, wait_measured(process))
+        if error:
+            stderr.seek(0)
+            output = stderr.read().strip()
+            raise RuntimeError(f"{error}: {output}" if output else f"{error}.")
+        stdout.seek(0)
+        return analyzer.parse(stdout.read())
+
+def run_analyzer(analyzer, repo_path, repo_id=None):
+    """Run one analyzer and return {"result", "error", "timing"}, timing being its analysis_execution_log row."""
+    outcome = {"result": None, "error": None, "timing": None}
+    try:
+        with timed_stage(analyzer.stage, analyzer.name, repo_id) as row:
+            outcome["timing"] = row
+            if analyzer.command:
+                outcome["result"] = run_command(analyzer, repo_path)
+            else:
+                outcome["result"] = analyzer.func(repo_path, analyzer)
+    except Exception as e:
+        logger.error(f"{analyzer.name} failed on {repo_path}: {e}")
+        outcome["error"] = str(e)
+    return outcome
+
+def abandoned_outcome(analyzer, repo_id, started, execution_time):
+    """The outcome of an analyzer still running past its deadline, whose thread is left to finish on its own."""
+    duration = time.perf_counter() - started
+    error = f"{analyzer.name} was abandoned after {duration:.0f}s, past its {analyzer.timeout_seconds}s timeout."
+    timing = {
+        "method_name": analyzer.name,
+        "stage": analyzer.stage,
+        "repo_id": repo_id,
+        "status": "FAILURE",
+        "message": f"ERROR: {error}\n",
+        "execution_time": execution_time,
+        "bytes_cloned": None,
+        "duration": duration,
+        "cpu_time": None,  # Only known once the thread finishes
+        "peak_rss_bytes": None,
+    }
+    return {"result": None, "error": error, "timing": timing}
+
+def run_analyzers(repo_path, analyzers, repo_id=None):
+    """
+    Run independent analyzers on one checkout at the same time, so the wall time is about
+    that of the slowest tool. Returns {analyzer name: {"result", "error", "timing"}}; one
+    analyzer failing does not affect the others. A command's timeout stops only that
+    command, so an analyzer still running DEADLINE_GRACE_SECONDS past its timeout_seconds
+    (e.g. a function stuck outside its commands) is reported as failed and not waited for.
+    """
+    started = time.perf_counter()
+    execution_time = datetime.utcnow()
+    executor = ThreadPoolExecutor(max_workers=max(len(analyzers), 1))
+    futures = {analyzer.name: executor.submit(run_analyzer, analyzer, repo_path, repo_id) for analyzer in analyzers}
+    outcomes = {}
+    for analyzer in analyzers:
+        deadline = started + analyzer.timeout_seconds + KILL_AFTER_SECONDS + DEADLINE_GRACE_SECONDS
+        try:
+            outcomes[analyzer.name] = futures[analyzer.name].result(timeout=max(deadline - time.perf_counter(), 0))
+        except TimeoutError:
+            outcomes[analyzer.name] = abandoned_outcome(analyzer, repo_id, started, execution_time)
+            logger.error(f"{analyzer.name} failed on {repo_path}: {outcomes[analyzer.name]['error']}")
+    executor.shutdown(wait=False)
+    for name, outcome in outcomes.items():
+        timing = outcome["timing"]
+        cpu_time = "unknown" if timing["cpu_time"] is None else f"{timing['cpu_time']:.2f}s"
+        logger.info(f"{name} on {repo_path}: {timing['status']} in {timing['duration']:.2f}s, CPU {cpu_time}")
+    return outcomes
@@ -0,0 +1,146 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class DiskBudget:
+    """
+    Admission control for checkouts on one filesystem. A caller reserves a checkout's
+    expected size before writing it and is admitted once the statvfs free space, less the
+    headroom and the reservations still outstanding, covers it; otherwise it waits. Settle
+    the reservation once the checkout is on disk, since statvfs accounts for it from then on.
+    Reservations live in a flock-protected JSON ledger next to the checkouts, so every
+    worker process on the host admits against the same outstanding total; entries of
+    processes that died without settling are dropped.
+    """
+
+    def __init__(self, path, headroom_bytes=0, poll_seconds=5.0, max_wait_seconds=3600, ledger_path=None):
+        self.path = path
+        self.headroom_bytes = headroom_bytes
+        self.poll_seconds = poll_seconds  # Space freed by other processes is only noticed by polling
+        self.max_wait_seconds = max_wait_seconds
+        self.ledger_path = ledger_path or os.path.join(path, ".disk_budget.json")
+        self.reserved = 0  # This process's share of the ledger
+        self.stats = {"admitted": 0, "waited": 0, "waited_seconds": 0.0, "peak_reserved": 0}
+        self._condition = threading.Condition()
+        os.makedirs(path, exist_ok=True)
+
+    @contextmanager
+    def _ledger(self):
+        """Yield the host's outstanding reservations, {id: [pid, size]}, under an exclusive flock."""
+        with open(self.ledger_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                ledger = {key: entry for key, entry in (json.loads(raw) if raw else {}).items() if process_alive(entry[0])}
+                yield ledger
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(ledger))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def capacity_bytes(self):
+        st = os.statvfs(self.path)
+        return st.f_blocks * st.f_frsize
+
+    def free_bytes(self):
+        st = os.statvfs(self.path)
+        return st.f_bavail * st.f_frsize
+
+    def reserved_bytes(self):
+        """Bytes reserved by every process on the host and not yet settled."""
+        with self._ledger() as ledger:
+            return sum(size for _, size in ledger.values())
+
+    def available_bytes(self):
+        """Free space that may still be handed out."""
+        return self.free_bytes() - self.headroom_bytes - self.reserved_bytes()
+
+    def _try_reserve(self, size):
+        """Record a reservation of size bytes and return its ledger ID, or None if it does not fit."""
+        with self._ledger() as ledger:
+            reserved = sum(size for _, size in ledger.values())
+            if self.free_bytes() - self.headroom_bytes - reserved < size:
+                return None
+            key = uuid.uuid4().hex
+            ledger[key] = [os.getpid(), size]
+            return key
+
+    def reserve(self, size):
+        """Block until size bytes can be admitted and return the Reservation."""
+        start = time.perf_counter()
+        with self._condition:
+            while True:
+                key = self._try_reserve(size)
+                if key is not None:
+                    break
+                waited = time.perf_counter() - start
+                if waited >= self.max_wait_seconds:
+                    raise RuntimeError(f"Waited {waited:.0f}s for {size} bytes of disk space in {self.path}.")
+                self._condition.wait(self.poll_seconds)
+            self.reserved += size
+            self.stats["admitted"] += 1
+            self.stats["peak_reserved"] = max(self.stats["peak_reserved"], self.reserved)
+        waited = time.perf_counter() - start
+        if waited > self.poll_seconds:
+            self.stats["waited"] += 1
+            self.stats["waited_seconds"] += waited
+            logger.info(f"Admitted {size} bytes in {self.path} after waiting {waited:.1f}s.")
+        return Reservation(self, key, size)
+
+    def release(self, key, size):
+        with self._condition:
+            with self._ledger() as ledger:
+                ledger.pop(key, None)
+            self.reserved -= size
+            self._condition.notify_all()
+
+    def notify(self):
+        """Wake waiting callers to re-check free space, e.g. after a checkout is removed."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def log_stats(self):
+        """Log this process's admission counters, the current free space and the host's outstanding reservations."""
+        logger.info(
+            f"Disk budget for {self.path}: {self.stats}, free {self.free_bytes()} bytes, "
+            f"reserved {self.reserved} bytes here and {self.reserved_bytes()} bytes on the host"
+        )
+
+def process_alive(pid):
+    """True while a process with this PID exists on the host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists but belongs to another user
+    return True
+
+class Reservation:
+    """Space reserved in a DiskBudget; settle it (or leave its with-block) once the data is on disk."""
+
+    def __init__(self, budget, key, size):
+        self.budget = budget
+        self.key = key
+        self.size = size
+
+    def settle(self):
+        if self.size:
+            self.budget.release(self.key, self.size)
+            self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.settle()
@@ -0,0 +1,102 @@
+import logging
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from process_usage import track_child_usage
+
+logger = logging.getLogger(__name__)
+
+def cpu_seconds(per_process):
+    """CPU time of this process and its finished children, or of the calling thread only."""
+    if not per_process:
+        return time.thread_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+@contextmanager
+def timed_stage(stage, method_name, repo_id=None, per_process=False):
+    """
+    Time a block and yield its analysis_execution_log row, filled in on exit with the wall
+    time, CPU time, peak RSS and SUCCESS/FAILURE status. CPU time is the calling thread's
+    plus that of the subprocesses it reaped through process_usage, and peak RSS is that of
+    the largest such subprocess (None for stages that ran none): ru_maxrss of this process
+    only ever grows, so it cannot single out a stage. Use per_process=True only where one
+    process runs one stage at a time, to count all of its CPU time and its children's.
+    Callers may set extra columns such as bytes_cloned on the row.
+    """
+    row = {
+        "method_name": method_name,
+        "stage": stage,
+        "repo_id": repo_id,
+        "status": "SUCCESS",
+        "message": None,
+        "execution_time": datetime.utcnow(),
+        "bytes_cloned": None,
+    }
+    start = time.perf_counter()
+    start_cpu = cpu_seconds(per_process)
+    with track_child_usage() as children:
+        try:
+            yield row
+        except Exception as e:
+            row["status"] = "FAILURE"
+            row["message"] = f"ERROR: {e}\n"
+            raise
+        finally:
+            row["duration"] = time.perf_counter() - start
+            row["cpu_time"] = cpu_seconds(per_process) - start_cpu
+            if not per_process:  # RUSAGE_CHILDREN already includes the reaped children
+                row["cpu_time"] += children.cpu_time
+            row["peak_rss_bytes"] = children.peak_rss_bytes
+
+class ExecutionLog:
+    """
+    Buffer of analysis_execution_log rows for one run, written in batches of flush_size
+    (and on flush()) instead of one insert per stage. Safe to share between threads.
+    """
+
+    def __init__(self, session_factory, model, run_id, flush_size=200):
+        self.session_factory = session_factory
+        self.model = model
+        self.run_id = run_id
+        self.flush_size = flush_size
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def add(self, row):
+        with self._lock:
+            self.rows.append({**row, "run_id": self.run_id})
+            full = len(self.rows) >= self.flush_size
+        if full:
+            self.flush()
+
+    @contextmanager
+    def stage(self, stage, method_name, repo_id=None, per_process=False):
+        """timed_stage that adds its row to the buffer on exit, whether or not the block failed."""
+        row = None
+        try:
+            with timed_stage(stage, method_name, repo_id=repo_id, per_process=per_process) as row:
+                yield row
+        finally:
+            if row is not None:
+                self.add(row)
+
+    def flush(self):
+        with self._lock:
+            rows, self.rows = self.rows, []
+        if not rows:
+            return
+        session = self.session_factory()
+        try:
+            session.execute(insert(self.model), rows)
+            session.commit()
+            logger.debug(f"Wrote {len(rows)} execution log rows for run {self.run_id}.")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error writing {len(rows)} execution log rows for run {self.run_id}: {e}")
+        finally:
+            session.close()
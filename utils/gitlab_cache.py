@@ -0,0 +1,154 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB of cached response bodies
+
+# Headers that describe the wire encoding of the original body, not the cached one
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+# Query parameters of requests that are not cached: per_page=1 requests are read for their
+# X-Total headers, which the body's ETag does not cover, and since/until windows carry a
+# fresh timestamp on every run, so their keys would never be hit again
+UNCACHED_PARAMS = {"since", "until"}
+
+def is_cacheable(url):
+    params = dict(parse_qsl(urlsplit(url).query, keep_blank_values=True))
+    return params.get("per_page") != "1" and not UNCACHED_PARAMS.intersection(params)
+
+def normalize_cache_key(url):
+    """Build a cache key from a URL with its query parameters in a stable order."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+class ResponseCache:
+    """SQLite-backed store of ETag-tagged GET responses with size-bounded LRU eviction."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                cache_key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, cache_key):
+        """Return (etag, headers, body) for a key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, headers, body FROM http_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def touch(self, cache_key):
+        """Mark a key as recently used."""
+        with self._lock:
+            self._conn.execute("UPDATE http_cache SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key))
+            self._conn.commit()
+
+    def put(self, cache_key, etag, headers, body):
+        """Store a response and evict least recently used entries beyond max_bytes."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache (cache_key, etag, headers, body, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, etag, json.dumps(headers), body, len(body), time.time()),
+            )
+            self.stats["stored"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for cache_key, size in self._conn.execute("SELECT cache_key, size FROM http_cache ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            victims.append((cache_key,))
+            total -= size
+        self._conn.executemany("DELETE FROM http_cache WHERE cache_key = ?", victims)
+        self.stats["evicted"] += len(victims)
+        logger.debug(f"Evicted {len(victims)} cached responses to stay under {self.max_bytes} bytes.")
+
+    def log_stats(self):
+        """Log hit/miss counters for this process."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0
+        logger.info(f"HTTP cache stats: {self.stats}, hit rate: {hit_rate:.1%}")
+
+class CachedSession(requests.Session):
+    """
+    requests session that revalidates GET responses with If-None-Match.
+    A 304 from the server is answered from the cache as a normal 200, with the
+    304's own headers laid over the stored ones, so it can be passed to
+    gitlab.Gitlab(session=...) without python-gitlab noticing.
+    """
+
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != "GET" or kwargs.get("stream") or not is_cacheable(request.url):
+            return super().send(request, **kwargs)
+
+        cache_key = normalize_cache_key(request.url)
+        cached = self.cache.get(cache_key)
+        if cached:
+            request.headers["If-None-Match"] = cached[0]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached:
+            self.cache.stats["hits"] += 1
+            self.cache.touch(cache_key)
+            return self._cached_response(request, response, cached)
+
+        self.cache.stats["misses"] += 1
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+            self.cache.put(cache_key, etag, headers, response.content)
+        return response
+
+    @staticmethod
+    def _cached_response(request, not_modified, cached):
+        etag, headers, body = cached
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        # The ETag only covers the body; pagination totals and the like come from the server
+        response.headers.update(
+            (k, v) for k, v in not_modified.headers.items() if k.lower() not in DROPPED_HEADERS
+        )
+        response._content = body
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = not_modified.elapsed
+        return response
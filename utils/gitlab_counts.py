@@ -0,0 +1,68 @@
+import logging
+import gitlab
+from dateutil.parser import parse
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_PER_PAGE = 100  # Page size used when GitLab does not report totals
+
+def count_collection(gl, path, query_data=None):
+    """
+    Count the items of a paginated GitLab collection with a single request.
+    Asks for one item and reads the X-Total header. GitLab leaves X-Total and
+    X-Total-Pages off for collections above 10,000 rows, in which case the
+    collection is paged through and counted.
+    """
+    query_data = dict(query_data or {})
+    response = gl.http_get(path, query_data={**query_data, "per_page": 1, "page": 1}, raw=True)
+    total = response.headers.get("X-Total") or response.headers.get("X-Total-Pages")
+    if total:
+        return int(total)
+
+    logger.info(f"No total headers returned for {path}; counting by paging.")
+    items = gl.http_list(path, query_data=query_data, per_page=FALLBACK_PER_PAGE, iterator=True)
+    return sum(1 for _ in items)
+
+def fetch_project_statistics(gl, project_id):
+    """Return the project's statistics payload, or None if the token cannot see it."""
+    try:
+        project = gl.http_get(f"/projects/{project_id}", query_data={"statistics": True})
+        return project.get("statistics")
+    except gitlab.exceptions.GitlabHttpError as e:
+        logger.warning(f"Could not fetch statistics for project ID {project_id}: {e}")
+        return None
+
+def count_commits(gl, project_id, since=None, until=None, statistics=None):
+    """
+    Count commits on the default branch, optionally limited to a date window.
+    Full-history counts come from the project statistics payload when it is
+    available (pass it in if the project was already fetched with statistics).
+    """
+    if since is None and until is None:
+        if statistics is None:
+            statistics = fetch_project_statistics(gl, project_id)
+        if statistics and statistics.get("commit_count") is not None:
+            return statistics["commit_count"]
+
+    query_data = {}
+    if since:
+        query_data["since"] = since
+    if until:
+        query_data["until"] = until
+    return count_collection(gl, f"/projects/{project_id}/repository/commits", query_data)
+
+def count_branches(gl, project_id):
+    """Count the branches of a project."""
+    return count_collection(gl, f"/projects/{project_id}/repository/branches")
+
+def count_contributors(gl, project_id):
+    """Count the contributors over the full history of a project."""
+    return count_collection(gl, f"/projects/{project_id}/repository/contributors")
+
+def fetch_last_commit_date(gl, project_id, since=None):
+    """Return the date of the newest commit on the default branch, or None."""
+    query_data = {"per_page": 1, "page": 1}
+    if since:
+        query_data["since"] = since
+    commits = gl.http_get(f"/projects/{project_id}/repository/commits", query_data=query_data)
+    return parse(commits[0]["created_at"]) if commits else None
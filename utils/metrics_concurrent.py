@@ -4,13 +4,18 @@ from datetime import datetime, timedelta
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String, DateTime, create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.postgresql import insert
 import gitlab
 import pandas as pd
-from urllib.parse import urlparse, quote
 import logging
 from dateutil.parser import parse
 from datetime import timezone
 import json
+from functools import cached_property, lru_cache
+from gitlab_cache import CachedSession, ResponseCache
+from rate_limiter import RateLimiter, mount_rate_limiter
+from project_id_cache import ProjectIdCache
+from commit_stats import aggregate_commits
 
 # Configuration
 GITLAB_URL = "https://gitlab.example.com"
@@ -21,7 +26,14 @@ DB_PASSWORD = "your_db_password"
 DB_HOST = "localhost"
 DB_PORT = 5432
 INPUT_FILE = "/path/to/input_projects.csv"
+HTTP_CACHE_PATH = "/path/to/gitlab_http_cache.sqlite"  # On-disk ETag cache for GitLab responses
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RATE_LIMIT_STATE_PATH = "/tmp/gitlab_rate_limit.json"  # Token bucket shared by every worker on this host
 N_DAYS = 7  # Number of days to look back for metrics
+MULTI_WINDOW_METRICS = False  # Also compute every METRIC_WINDOWS window from one commit fetch
+METRIC_WINDOWS = [7, 30, 90, 365]  # Activity windows in days stored in project_window_metrics
+CONTRIBUTOR_SKETCH = False  # Estimate distinct contributors with a fixed-memory HyperLogLog sketch
+BRANCH_ACTIVITY_MODE = "commit_index"  # "commit_index" matches heads to recent commits, "committed_date" reads each head's date
 
 # Logging Configuration
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -46,105 +58,209 @@ class ProjectMetric(Base):
     appname = Column(String)
     gitlab_workspace = Column(String)
 
-# Initialize GitLab client
-gl = gitlab.Gitlab(GITLAB_URL, private_token=PRIVATE_TOKEN, ssl_verify=False)
+class ProjectWindowMetric(Base):
+    __tablename__ = "project_window_metrics"
+    project_id = Column(Integer, primary_key=True)
+    window_days = Column(Integer, primary_key=True)
+    commit_count = Column(Integer)
+    contributor_count = Column(Integer)
+    branch_count = Column(Integer)
+    last_commit_date = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-# Create database engine and session
-engine = create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
-Session = sessionmaker(bind=engine)
-session = Session()
+# Clients are built on first use inside a task, never while the scheduler parses the DAG
+@lru_cache(maxsize=None)
+def get_http_cache():
+    """Open the on-disk ETag cache."""
+    return ResponseCache(HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES)
 
-def get_project_id_from_url(project_url):
-    try:
-        logger.info(f"Fetching project ID for URL: {project_url}")
-        parsed_url = urlparse(project_url)
-        project_path = parsed_url.path.strip("/")
-        encoded_path = quote(project_path, safe="")
-        project = gl.http_get(f"/projects/{encoded_path}")
-        project_id = project["id"]
-        logger.info(f"Fetched project ID: {project_id} for URL: {project_url}")
-        return project_id
-    except Exception as e:
-        logger.error(f"Error fetching project ID for URL: {project_url} - {e}")
-        raise
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    """Attach to the host-wide GitLab request budget."""
+    return RateLimiter(RATE_LIMIT_STATE_PATH)
+
+@lru_cache(maxsize=None)
+def get_gitlab():
+    """Initialize the GitLab client with conditional-request caching and shared rate limiting."""
+    http_session = mount_rate_limiter(CachedSession(get_http_cache()), get_rate_limiter())
+    return gitlab.Gitlab(GITLAB_URL, private_token=PRIVATE_TOKEN, ssl_verify=False, session=http_session)
+
+@lru_cache(maxsize=None)
+def get_engine():
+    """Create the database engine."""
+    return create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
 
-def fetch_commits_last_n_days(project_id, days):
+@lru_cache(maxsize=None)
+def get_session():
+    """Open the session shared by this worker process."""
+    return sessionmaker(bind=get_engine())()
+
+@lru_cache(maxsize=None)
+def get_project_id_cache():
+    """URL -> project ID map shared with the other GitLab DAGs."""
+    return ProjectIdCache(get_gitlab(), get_engine())
+
+class ProjectSnapshot:
+    """
+    The GitLab data for one project over the last N days, fetched at most once each.
+    Metric calculators take a snapshot instead of a project ID so they never repeat
+    an API call; the project, commit totals, branches and languages are fetched on
+    first use. Commits are streamed page by page into per-window totals, so memory
+    does not grow with the number of commits.
+    """
+
+    def __init__(self, project_id, days, windows=None):
+        self.project_id = project_id
+        self.days = days
+        self.until_date = datetime.utcnow().isoformat() + "Z"
+        self.since_date = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+        now = datetime.now(timezone.utc)
+        self.cutoffs = {window: now - timedelta(days=window) for window in (windows or [days])}
+
+    @cached_property
+    def project(self):
+        return get_gitlab().projects.get(self.project_id)
+
+    @cached_property
+    def commit_stats(self):
+        """CommitStats per window and the dates of branch-head commits, from one pass over the commits."""
+        logger.info(f"Streaming commits for project ID: {self.project_id} for the last {self.days} days")
+        logger.debug(f"Commit API parameters - since: {self.since_date}, until: {self.until_date}")
+        head_ids = [branch.commit["id"] for branch in self.branches] if BRANCH_ACTIVITY_MODE == "commit_index" else ()
+        commits = self.project.commits.list(since=self.since_date, until=self.until_date, per_page=100, iterator=True)
+        return aggregate_commits(commits, cutoffs=self.cutoffs, head_ids=head_ids, use_sketch=CONTRIBUTOR_SKETCH)
+
+    def window_stats(self, days):
+        """CommitStats for one of the snapshot's windows."""
+        return self.commit_stats[0][days]
+
+    @property
+    def head_commit_dates(self):
+        """Hashed index of the branch-head commits seen in the snapshot, mapped to their dates."""
+        return self.commit_stats[1]
+
+    @cached_property
+    def branches(self):
+        logger.info(f"Fetching branches for project ID: {self.project_id}")
+        return self.project.branches.list(all=True)
+
+    @cached_property
+    def languages(self):
+        logger.info(f"Fetching languages for project ID: {self.project_id}")
+        return self.project.languages()
+
+def fetch_commits_last_n_days(snapshot):
     try:
-        logger.info(f"Fetching commits for project ID: {project_id} for the last {days} days")
-        since_date = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
-        until_date = datetime.utcnow().isoformat() + "Z"
-        logger.debug(f"Commit API parameters - since: {since_date}, until: {until_date}")
-
-        project = gl.projects.get(project_id)
-        commits = project.commits.list(since=since_date, until=until_date, all=True)
-
-        # Determine the latest commit date
-        last_commit_date = max(
-            (parse(commit.created_at) for commit in commits),
-            default=None,
-        )
-
-        logger.info(f"Fetched {len(commits)} commits. Last commit date: {last_commit_date}")
-        return commits, last_commit_date
+        stats = snapshot.window_stats(snapshot.days)
+        logger.info(f"Fetched {stats.commit_count} commits. Last commit date: {stats.last_commit_date}")
+        return stats.commit_count, stats.last_commit_date
     except Exception as e:
-        logger.error(f"Error fetching commits for project ID {project_id}: {e}")
+        logger.error(f"Error fetching commits for project ID {snapshot.project_id}: {e}")
         raise
 
-def fetch_contributor_count_last_n_days(project_id, days):
+def fetch_contributor_count_last_n_days(snapshot):
     try:
-        logger.info(f"Fetching contributors for the last {days} days for project ID: {project_id}")
-        commits, _ = fetch_commits_last_n_days(project_id, days)
-        contributors = {commit.author_email for commit in commits}
-        logger.info(f"Fetched {len(contributors)} contributors for the last {days} days for project ID: {project_id}")
-        return len(contributors)
+        contributor_count = snapshot.window_stats(snapshot.days).contributor_count
+        logger.info(f"Fetched {contributor_count} contributors for the last {snapshot.days} days for project ID: {snapshot.project_id}")
+        return contributor_count
     except Exception as e:
-        logger.error(f"Error fetching contributors for project ID {project_id}: {e}")
+        logger.error(f"Error fetching contributors for project ID {snapshot.project_id}: {e}")
         raise
 
-def fetch_branch_count_last_n_days(project_id, days):
+def count_active_branches_by_index(branches, commit_ids):
+    """Count branches whose head commit is in a hashed collection of recent commit IDs."""
+    return sum(1 for branch in branches if branch.commit["id"] in commit_ids)
+
+def count_active_branches_by_date(branches, cutoff):
+    """Count branches whose head commit was committed at or after the cutoff."""
+    return sum(1 for branch in branches if parse(branch.commit["committed_date"]) >= cutoff)
+
+def fetch_branch_count_last_n_days(snapshot):
     """
-    Fetch branches with commits in the last N days by matching commits to branch heads.
+    Fetch branches with commits in the last N days. "commit_index" mode matches branch
+    heads against the snapshot's recent commits (which only cover the default branch);
+    "committed_date" mode reads each head's committed_date and needs no commit listing.
     """
     try:
-        logger.info(f"Fetching branches with commits in the last {days} days for project ID: {project_id}")
-        cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+        logger.info(f"Matching branches with commits in the last {snapshot.days} days for project ID: {snapshot.project_id}")
 
-        # Fetch recent commits
-        project = gl.projects.get(project_id)
-        recent_commits = project.commits.list(since=cutoff_date, all=True)
-
-        # Fetch all branches
-        branches = project.branches.list(all=True)
-
-        # Match branches with recent commits
-        active_branches = []
-        for branch in branches:
-            branch_commit_id = branch.commit["id"]
-            if any(commit.id == branch_commit_id for commit in recent_commits):
-                active_branches.append(branch.name)
+        if BRANCH_ACTIVITY_MODE == "committed_date":
+            cutoff = datetime.now(timezone.utc) - timedelta(days=snapshot.days)
+            active_branch_count = count_active_branches_by_date(snapshot.branches, cutoff)
+        else:
+            active_branch_count = count_active_branches_by_index(snapshot.branches, snapshot.head_commit_dates)
 
-        logger.info(f"Fetched {len(active_branches)} branches active in the last {days} days for project ID: {project_id}")
-        return len(active_branches)
+        logger.info(f"Fetched {active_branch_count} branches active in the last {snapshot.days} days for project ID: {snapshot.project_id}")
+        return active_branch_count
     except Exception as e:
-        logger.error(f"Error fetching branches for project ID {project_id}: {e}")
+        logger.error(f"Error fetching branches for project ID {snapshot.project_id}: {e}")
         raise
 
-def fetch_project_languages(project_id):
+def fetch_project_languages(snapshot):
     """
     Fetch the languages used in a GitLab project.
     """
     try:
-        logger.info(f"Fetching languages for project ID: {project_id}")
-        project = gl.projects.get(project_id)
-        languages = project.languages()
-        languages_text = json.dumps(languages)
-        logger.info(f"Languages for project ID {project_id}: {languages_text}")
+        languages_text = json.dumps(snapshot.languages)
+        logger.info(f"Languages for project ID {snapshot.project_id}: {languages_text}")
         return languages_text
     except Exception as e:
-        logger.error(f"Error fetching languages for project ID {project_id}: {e}")
+        logger.error(f"Error fetching languages for project ID {snapshot.project_id}: {e}")
+        raise
+
+def compute_window_metrics(snapshot):
+    """
+    Compute commit count, distinct contributors, active branches and last commit date
+    for every window of the snapshot from its single streamed pass over the commits.
+    """
+    # A branch is active in a window if its head commit falls inside it
+    if BRANCH_ACTIVITY_MODE == "committed_date":
+        head_dates = [parse(branch.commit["committed_date"]) for branch in snapshot.branches]
+    else:
+        # One date per branch: branches sharing a head commit each count
+        head_dates = [
+            snapshot.head_commit_dates[branch.commit["id"]]
+            for branch in snapshot.branches
+            if branch.commit["id"] in snapshot.head_commit_dates
+        ]
+
+    return {
+        days: {
+            "commit_count": snapshot.window_stats(days).commit_count,
+            "contributor_count": snapshot.window_stats(days).contributor_count,
+            "branch_count": sum(1 for head_date in head_dates if head_date >= cutoff),
+            "last_commit_date": snapshot.window_stats(days).last_commit_date,
+        }
+        for days, cutoff in snapshot.cutoffs.items()
+    }
+
+def upsert_window_metrics(project_id, window_metrics):
+    """Upsert every window's metrics for a project in one statement."""
+    session = get_session()
+    try:
+        stmt = insert(ProjectWindowMetric).values([
+            {"project_id": project_id, "window_days": days, "updated_at": datetime.utcnow(), **metrics}
+            for days, metrics in window_metrics.items()
+        ])
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["project_id", "window_days"],
+            set_={
+                "commit_count": stmt.excluded.commit_count,
+                "contributor_count": stmt.excluded.contributor_count,
+                "branch_count": stmt.excluded.branch_count,
+                "last_commit_date": stmt.excluded.last_commit_date,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ))
+        session.commit()
+        logger.info(f"Upserted {len(window_metrics)} window metrics for project ID: {project_id}")
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error upserting window metrics for project ID {project_id}: {e}")
         raise
 
 def upsert_with_orm(project_id, project_url, metrics, extra_data):
+    session = get_session()
     try:
         logger.info(f"Upserting metrics for project ID: {project_id}")
         record = session.query(ProjectMetric).filter_by(project_id=project_id).first()
@@ -181,24 +297,27 @@ def process_project(row):
         project_url = row["gitlab_project_url"].strip()
         logger.info(f"Starting processing for project URL: {project_url}")
 
-        # Fetch project ID
-        project_id = get_project_id_from_url(project_url)
-
-        # Fetch metrics
-        commits, last_commit_date = fetch_commits_last_n_days(project_id, N_DAYS)
-        commit_count = len(commits)
-        contributor_count = fetch_contributor_count_last_n_days(project_id, N_DAYS)
-        branch_count = fetch_branch_count_last_n_days(project_id, N_DAYS)
-        languages = fetch_project_languages(project_id)
-
-        # Compile metrics
-        metrics = {
-            "commit_count": commit_count,
-            "contributor_count": contributor_count,
-            "branch_count": branch_count,
-            "last_commit_date": last_commit_date,
-            "languages": languages,
-        }
+        def fetch_all_metrics(project_id):
+            if MULTI_WINDOW_METRICS:
+                # Fetch back to the widest window once and derive N_DAYS from the same sweep
+                snapshot = ProjectSnapshot(project_id, max(METRIC_WINDOWS + [N_DAYS]), windows=METRIC_WINDOWS + [N_DAYS])
+                window_metrics = compute_window_metrics(snapshot)
+                metrics = dict(window_metrics[N_DAYS], languages=fetch_project_languages(snapshot))
+                return project_id, metrics, {days: window_metrics[days] for days in METRIC_WINDOWS}
+
+            # Every metric is derived from one snapshot of the project
+            snapshot = ProjectSnapshot(project_id, N_DAYS)
+            commit_count, last_commit_date = fetch_commits_last_n_days(snapshot)
+            return project_id, {
+                "commit_count": commit_count,
+                "contributor_count": fetch_contributor_count_last_n_days(snapshot),
+                "branch_count": fetch_branch_count_last_n_days(snapshot),
+                "last_commit_date": last_commit_date,
+                "languages": fetch_project_languages(snapshot),
+            }, None
+
+        # Fetch project ID and metrics; a cached ID that has since been deleted is expired and resolved again
+        project_id, metrics, window_metrics = get_project_id_cache().call_with_project_id(project_url, fetch_all_metrics)
 
         # Extract extra data
         extra_data = {
@@ -212,13 +331,26 @@ def process_project(row):
 
         # Upsert data into the database
         upsert_with_orm(project_id, project_url, metrics, extra_data)
+        if window_metrics:
+            upsert_window_metrics(project_id, window_metrics)
 
         logger.info(f"Completed processing for project URL: {project_url}")
+        get_http_cache().log_stats()
+        get_rate_limiter().log_stats()
 
     except Exception as e:
         logger.error(f"Error processing project URL: {project_url} - {e}")
         raise
 
+@task
+def load_project_rows():
+    """Read the input CSV into rows, one per mapped process_project task."""
+    logger.info("Starting DAG: GitLab Pipeline with Last Commit Date")
+    if MULTI_WINDOW_METRICS:
+        Base.metadata.create_all(get_engine(), tables=[ProjectWindowMetric.__table__])
+    df = pd.read_csv(INPUT_FILE)
+    return df.to_dict(orient="records")
+
 @dag(
     dag_id="gitlab_pipeline_with_last_commit_date",
     start_date=datetime(2023, 1, 1),
@@ -226,9 +358,7 @@ def process_project(row):
     catchup=False,
 )
 def gitlab_pipeline_with_last_commit_date():
-    logger.info("Starting DAG: GitLab Pipeline with Last Commit Date")
-    df = pd.read_csv(INPUT_FILE)
-    rows = df.to_dict(orient="records")
-    process_project.expand(row=rows)
+    # The CSV is read at run time, so parsing this file does no I/O
+    process_project.expand(row=load_project_rows())
 
 dag = gitlab_pipeline_with_last_commit_date()
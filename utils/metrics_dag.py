@@ -6,7 +6,11 @@ from sqlalchemy import Column, Integer, String, create_engine
 from sqlalchemy.orm import sessionmaker
 import gitlab
 import pandas as pd
-from urllib.parse import urlparse, quote
+from functools import lru_cache
+from gitlab_cache import CachedSession, ResponseCache
+from rate_limiter import RateLimiter, mount_rate_limiter
+from project_id_cache import ProjectIdCache
+from gitlab_counts import count_branches, count_commits, count_contributors
 
 # Configuration
 GITLAB_URL = "https://gitlab.example.com"
@@ -17,6 +21,9 @@ DB_PASSWORD = "your_db_password"
 DB_HOST = "localhost"
 DB_PORT = 5432
 INPUT_FILE = "/path/to/input_projects.csv"
+HTTP_CACHE_PATH = "/path/to/gitlab_http_cache.sqlite"  # On-disk ETag cache for GitLab responses
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RATE_LIMIT_STATE_PATH = "/tmp/gitlab_rate_limit.json"  # Token bucket shared by every worker on this host
 
 # SQLAlchemy Base and ORM Model
 Base = declarative_base()
@@ -29,25 +36,42 @@ class ProjectMetric(Base):
     contributor_count = Column(Integer)
     branch_count = Column(Integer)
 
-# Initialize GitLab client
-gl = gitlab.Gitlab(GITLAB_URL, private_token=PRIVATE_TOKEN, ssl_verify=False)
+# Clients are built on first use inside a task, never while the scheduler parses the DAG
+@lru_cache(maxsize=None)
+def get_http_cache():
+    """Open the on-disk ETag cache."""
+    return ResponseCache(HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES)
+
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    """Attach to the host-wide GitLab request budget."""
+    return RateLimiter(RATE_LIMIT_STATE_PATH)
+
+@lru_cache(maxsize=None)
+def get_gitlab():
+    """Initialize the GitLab client with conditional-request caching and shared rate limiting."""
+    return gitlab.Gitlab(
+        GITLAB_URL,
+        private_token=PRIVATE_TOKEN,
+        ssl_verify=False,
+        session=mount_rate_limiter(CachedSession(get_http_cache()), get_rate_limiter()),
+    )
 
 # Create database engine and session
 engine = create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
 Session = sessionmaker(bind=engine)
 session = Session()
 
-def get_project_id_from_url(project_url):
-    parsed_url = urlparse(project_url)
-    project_path = parsed_url.path.strip("/")
-    encoded_path = quote(project_path, safe="")
-    project = gl.http_get(f"/projects/{encoded_path}")
-    return project["id"]
+@lru_cache(maxsize=None)
+def get_project_id_cache():
+    """URL -> project ID map shared with the other GitLab DAGs."""
+    return ProjectIdCache(get_gitlab(), engine)
 
 def fetch_metrics(project_id):
-    commit_count = len(gl.projects.get(project_id).commits.list(all=True))
-    contributor_count = len(gl.projects.get(project_id).repository_contributors())
-    branch_count = len(gl.projects.get(project_id).branches.list(all=True))
+    gl = get_gitlab()
+    commit_count = count_commits(gl, project_id)
+    contributor_count = count_contributors(gl, project_id)
+    branch_count = count_branches(gl, project_id)
     return {
         "commit_count": commit_count,
         "contributor_count": contributor_count,
@@ -78,8 +102,10 @@ def upsert_with_orm(project_id, project_url, metrics):
 
 def process_project(project_url):
     try:
-        project_id = get_project_id_from_url(project_url)
-        metrics = fetch_metrics(project_id)
+        # A cached project ID that has since been deleted is expired and resolved again
+        project_id, metrics = get_project_id_cache().call_with_project_id(
+            project_url, lambda project_id: (project_id, fetch_metrics(project_id))
+        )
         upsert_with_orm(project_id, project_url, metrics)
     except Exception as e:
         print(f"Error processing {project_url}: {e}")
@@ -95,6 +121,8 @@ def process_projects():
         if not project_url:
             continue
         process_project(project_url)
+    get_http_cache().log_stats()
+    get_rate_limiter().log_stats()
 
 # Define Airflow DAG
 with DAG(
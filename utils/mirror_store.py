@@ -0,0 +1,167 @@
+import fcntl
+import logging
+import os
+import shutil
+import subprocess
+from process_usage import run_measured
+from urllib.parse import quote, unquote
+
+logger = logging.getLogger(__name__)
+
+class MirrorStore:
+    """
+    Bare mirrors of remote repositories on local disk. A mirror is cloned once and then
+    refreshed with `git fetch --prune`, so repeat analyses only transfer new objects.
+    Working trees are checked out from a mirror as `git worktree`s that share its object
+    store. Mirrors are blobless by default; blobs are fetched on first checkout and then kept.
+    Each mirror has a flock file: updates take it exclusively, checkouts hold it shared,
+    and least-recently-used mirrors are evicted once the store exceeds max_bytes. Mirror
+    sizes are measured with `git count-objects` whenever a mirror changes and kept in a
+    size file next to it, so eviction does not walk the store.
+    """
+
+    def __init__(self, root, max_bytes, clone_filter="blob:none"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.clone_filter = clone_filter
+        self.stats = {"clones": 0, "fetches": 0, "evictions": 0}
+        os.makedirs(root, exist_ok=True)
+
+    def mirror_path(self, key):
+        return os.path.join(self.root, f"{quote(key, safe='')}.git")
+
+    def lock_path(self, key):
+        return os.path.join(self.root, f"{quote(key, safe='')}.lock")
+
+    def size_path(self, key):
+        return os.path.join(self.root, f"{quote(key, safe='')}.size")
+
+    def git(self, mirror, *args, timeout=None):
+        run_measured(["git", "-C", mirror, *args], check=True, timeout=timeout, capture_output=True)
+
+    def update(self, key, clone_url, timeout=None):
+        """Clone the mirror if it is missing, otherwise fetch and prune. Call with the mirror locked exclusively."""
+        mirror = self.mirror_path(key)
+        if os.path.isdir(mirror):
+            logger.info(f"Fetching updates into mirror {mirror}.")
+            self.git(mirror, "worktree", "prune")  # Drop worktrees of runs that died without cleaning up
+            self.git(mirror, "fetch", "--prune", "--update-head-ok", "origin", timeout=timeout)
+            self.stats["fetches"] += 1
+            self.record_size(key)
+            return
+
+        logger.info(f"Creating mirror {mirror}.")
+        args = ["git", "clone", "--bare"]
+        if self.clone_filter:
+            args.append(f"--filter={self.clone_filter}")
+        try:
+            run_measured([*args, clone_url, mirror], check=True, timeout=timeout, capture_output=True)
+            # Track branches and tags only; a full --mirror would also fetch pull request refs
+            self.git(mirror, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+            self.git(mirror, "config", "--add", "remote.origin.fetch", "+refs/tags/*:refs/tags/*")
+        except Exception:
+            shutil.rmtree(mirror, ignore_errors=True)
+            raise
+        self.stats["clones"] += 1
+        self.record_size(key)
+
+    def add_worktree(self, key, clone_url, work_dir, timeout=None):
+        """
+        Update the mirror for key and check out its default branch into work_dir as a worktree.
+        Returns the mirror's lock file, held shared until remove_worktree so the mirror is
+        neither updated nor evicted underneath the worktree.
+        """
+        lock = open(self.lock_path(key), "a+")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            os.utime(self.lock_path(key))  # Last-used time for eviction
+            mirror = self.mirror_path(key)
+            self.update(key, clone_url, timeout=timeout)
+            branch = run_measured(
+                ["git", "-C", mirror, "symbolic-ref", "--short", "HEAD"],
+                check=True, capture_output=True, text=True,
+            ).stdout.strip()
+            shutil.rmtree(work_dir, ignore_errors=True)
+            # --force lets concurrent analyses check out the same branch
+            self.git(mirror, "worktree", "add", "--force", work_dir, branch, timeout=timeout)
+            self.record_size(key)  # The checkout fetched the branch's missing blobs into the mirror
+            fcntl.flock(lock, fcntl.LOCK_SH)  # Let other checkouts in; keep updates and eviction out
+            return lock
+        except Exception:
+            self.discard_worktree(key, work_dir)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+            raise
+
+    def remove_worktree(self, key, work_dir, lock):
+        """Remove a worktree made by add_worktree, release its mirror and trim the store."""
+        try:
+            self.discard_worktree(key, work_dir)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+        self.evict()
+
+    def discard_worktree(self, key, work_dir):
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if os.path.isdir(self.mirror_path(key)):
+            try:
+                self.git(self.mirror_path(key), "worktree", "prune")
+            except subprocess.CalledProcessError as e:
+                logger.warning(f"Could not prune worktrees of mirror {key}: {e}")
+
+    def disk_usage(self, key):
+        """Bytes in the mirror's object store (loose objects, packs and garbage), from `git count-objects -v`."""
+        output = run_measured(
+            ["git", "-C", self.mirror_path(key), "count-objects", "-v"], check=True, capture_output=True, text=True,
+        ).stdout
+        fields = dict(line.split(": ", 1) for line in output.splitlines())
+        return sum(int(fields.get(field, 0)) for field in ("size", "size-pack", "size-garbage")) * 1024
+
+    def record_size(self, key):
+        """Measure a mirror and store its size for evict(). Call with the mirror locked exclusively."""
+        with open(self.size_path(key), "w") as f:
+            f.write(str(self.disk_usage(key)))
+
+    def recorded_size(self, key):
+        try:
+            with open(self.size_path(key)) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            pass
+        try:
+            return self.disk_usage(key)  # Mirror from before size files were kept
+        except (subprocess.CalledProcessError, ValueError):
+            return 0  # Being created by another process; it records its size when done
+
+    def evict(self):
+        """Remove least-recently-used mirrors until the store fits in max_bytes, skipping mirrors in use."""
+        mirrors = []
+        for name in os.listdir(self.root):
+            if name.endswith(".git"):
+                key = unquote(name[:-len(".git")])
+                last_used = os.path.getmtime(self.lock_path(key)) if os.path.exists(self.lock_path(key)) else 0
+                mirrors.append((last_used, key, self.recorded_size(key)))
+
+        total = sum(size for _, _, size in mirrors)
+        for _, key, size in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            with open(self.lock_path(key), "a+") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    shutil.rmtree(self.mirror_path(key), ignore_errors=True)
+                    if os.path.exists(self.size_path(key)):
+                        os.remove(self.size_path(key))
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+            total -= size
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted mirror {key} ({size} bytes); store now {total} bytes.")
+
+    def log_stats(self):
+        """Log this process's mirror counters."""
+        logger.info(f"Mirror store stats: {self.stats}")
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+class ChildUsage:
+    """CPU time and largest peak RSS of the subprocesses reaped while it was tracked."""
+
+    def __init__(self):
+        self.cpu_time = 0.0
+        self.peak_rss_bytes = None
+
+    def add(self, usage):
+        self.cpu_time += usage.ru_utime + usage.ru_stime
+        rss = usage.ru_maxrss * 1024  # ru_maxrss is in KiB on Linux
+        self.peak_rss_bytes = rss if self.peak_rss_bytes is None else max(self.peak_rss_bytes, rss)
+
+def _tracked():
+    if not hasattr(_local, "tracked"):
+        _local.tracked = []
+    return _local.tracked
+
+@contextmanager
+def track_child_usage():
+    """Yield a ChildUsage that collects the subprocesses this thread reaps with wait_measured."""
+    usage = ChildUsage()
+    _tracked().append(usage)
+    try:
+        yield usage
+    finally:
+        _tracked().remove(usage)
+
+def record_child_usage(usage):
+    """Add a reaped child's rusage to everything this thread is tracking."""
+    for tracked in _tracked():
+        tracked.add(usage)
+
+def wait_measured(process, timeout=None):
+    """
+    Reap a Popen with wait4 and record its rusage, which covers the child and the
+    descendants it waited for, unlike the process-wide RUSAGE_CHILDREN. Kills the child
+    after timeout seconds and raises TimeoutExpired. Returns the exit code.
+    """
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, expire) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    finally:
+        if timer:
+            timer.cancel()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    record_child_usage(usage)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(process.args, timeout)
+    return process.returncode
+
+def run_measured(args, check=False, timeout=None, capture_output=False, text=False, **kwargs):
+    """subprocess.run whose child is reaped with wait_measured, so its CPU time and peak RSS count towards the calling stage."""
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        if capture_output:
+            kwargs["stdout"] = stdout
+            kwargs["stderr"] = stderr
+        process = subprocess.Popen(args, **kwargs)
+        returncode = wait_measured(process, timeout)
+        output = errors = None
+        if capture_output:
+            stdout.seek(0)
+            stderr.seek(0)
+            output, errors = stdout.read(), stderr.read()
+            if text:
+                output, errors = output.decode(errors="replace"), errors.decode(errors="replace")
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, args, output, errors)
+    return subprocess.CompletedProcess(args, returncode, output, errors)
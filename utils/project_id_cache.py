@@ -0,0 +1,132 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, quote
+import gitlab
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+project_ids = Table(
+    "gitlab_project_ids",
+    metadata,
+    Column("project_path", String, primary_key=True),  # Path as it appears in the input URL
+    Column("project_id", Integer, nullable=False),
+    Column("path_with_namespace", String),  # Current path reported by GitLab
+    Column("resolved_at", DateTime, nullable=False),
+)
+
+INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def project_path_from_url(project_url):
+    """Extract the namespace/project path from a GitLab project URL."""
+    return urlparse(project_url.strip()).path.strip("/")
+
+def is_project_not_found(error):
+    """True if a GitLab error means the project itself is gone, not e.g. an empty repository."""
+    return getattr(error, "response_code", None) == 404 and "Project Not Found" in str(error.error_message)
+
+class ProjectIdCache:
+    """
+    Persistent URL -> GitLab project ID map: a DB table loaded once into an in-process dict.
+    Renamed or transferred projects are stored under both their old and current paths;
+    entries are dropped when GitLab answers 404 for the cached project ID.
+    """
+
+    def __init__(self, gl, engine, max_age_days=None):
+        self.gl = gl
+        self.engine = engine
+        self.max_age = timedelta(days=max_age_days) if max_age_days else None
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._ids is not None:
+            return
+        metadata.create_all(self.engine, tables=[project_ids])
+        cutoff = datetime.utcnow() - self.max_age if self.max_age else None
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(project_ids.c.project_path, project_ids.c.project_id, project_ids.c.resolved_at))
+            self._ids = {
+                row.project_path: row.project_id
+                for row in rows
+                if cutoff is None or row.resolved_at >= cutoff
+            }
+        logger.info(f"Loaded {len(self._ids)} cached GitLab project IDs.")
+
+    def _store(self, paths, project_id, path_with_namespace):
+        insert = INSERTS[self.engine.dialect.name]
+        rows = [
+            {
+                "project_path": path,
+                "project_id": project_id,
+                "path_with_namespace": path_with_namespace,
+                "resolved_at": datetime.utcnow(),
+            }
+            for path in paths
+        ]
+        stmt = insert(project_ids).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_path"],
+            set_={
+                "project_id": stmt.excluded.project_id,
+                "path_with_namespace": stmt.excluded.path_with_namespace,
+                "resolved_at": stmt.excluded.resolved_at,
+            },
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def lookup(self, project_url):
+        """Return the cached project ID for a URL, or None."""
+        with self._lock:
+            self._load()
+            return self._ids.get(project_path_from_url(project_url))
+
+    def resolve(self, project_url):
+        """Return the project ID for a URL, calling /projects/{path} only on a cache miss."""
+        project_id = self.lookup(project_url)
+        if project_id is not None:
+            return project_id
+
+        project_path = project_path_from_url(project_url)
+        project = self.gl.http_get(f"/projects/{quote(project_path, safe='')}")
+        project_id = project["id"]
+        paths = {project_path, project["path_with_namespace"]}
+        if project["path_with_namespace"] != project_path:
+            logger.info(f"Project {project_path} was renamed or moved to {project['path_with_namespace']}.")
+
+        self._store(paths, project_id, project["path_with_namespace"])
+        with self._lock:
+            for path in paths:
+                self._ids[path] = project_id
+        return project_id
+
+    def forget(self, project_id):
+        """Drop every cached path that points at a project ID."""
+        with self.engine.begin() as conn:
+            conn.execute(delete(project_ids).where(project_ids.c.project_id == project_id))
+        with self._lock:
+            self._ids = {path: cached_id for path, cached_id in (self._ids or {}).items() if cached_id != project_id}
+        logger.info(f"Expired cached paths for project ID {project_id}.")
+
+    def call_with_project_id(self, project_url, fn):
+        """
+        Call fn(project_id) for a URL. If a cached ID turns out to be gone, expire it,
+        resolve the URL again and retry once with the new ID.
+        """
+        cached_id = self.lookup(project_url)
+        project_id = cached_id if cached_id is not None else self.resolve(project_url)
+        try:
+            return fn(project_id)
+        except gitlab.exceptions.GitlabError as e:
+            if cached_id is None or not is_project_not_found(e):
+                raise
+            self.forget(cached_id)
+            fresh_id = self.resolve(project_url)
+            if fresh_id == cached_id:
+                raise
+            return fn(fresh_id)
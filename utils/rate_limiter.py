@@ -0,0 +1,125 @@
+import fcntl
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """
+    Token bucket whose state lives in a flock-protected JSON file, so every worker
+    process on a host draws from the same budget. The refill rate follows GitLab's
+    RateLimit-Remaining/RateLimit-Reset headers (spending the remaining quota evenly
+    until the reset), halves on a 429, and waits out Retry-After for all workers.
+    Without rate-limit headers the rate grows additively up to max_rate.
+    """
+
+    def __init__(self, state_path, rate=10.0, burst=10, min_rate=0.5, max_rate=50.0, increase_step=0.5, safety=0.9):
+        self.state_path = state_path
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.safety = safety  # Fraction of the remaining quota to plan for
+        self.stats = {"acquired": 0, "throttled": 0, "waited_seconds": 0.0}
+        self._lock = threading.Lock()  # flock does not serialize threads sharing one process
+
+    @contextmanager
+    def _state(self):
+        with self._lock, open(self.state_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                state = json.loads(raw) if raw else {
+                    "tokens": self.burst,
+                    "rate": self.initial_rate,
+                    "updated": time.time(),
+                    "blocked_until": 0,
+                }
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._state() as state:
+                now = time.time()
+                state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * state["rate"])
+                state["updated"] = now
+                if state["blocked_until"] > now:
+                    wait = state["blocked_until"] - now
+                elif state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    self.stats["acquired"] += 1
+                    return
+                else:
+                    wait = (1 - state["tokens"]) / state["rate"]
+            self.stats["waited_seconds"] += wait
+            time.sleep(wait)
+
+    def update(self, response):
+        """Adjust the shared rate from a response's rate-limit headers."""
+        headers = response.headers
+        now = time.time()
+        with self._state() as state:
+            if response.status_code == 429:
+                retry_after = parse_retry_after(headers.get("Retry-After"), now)
+                state["blocked_until"] = max(state["blocked_until"], now + retry_after)
+                state["rate"] = max(self.min_rate, state["rate"] / 2)
+                state["tokens"] = 0
+                self.stats["throttled"] += 1
+                logger.warning(f"Rate limited by server; pausing {retry_after:.1f}s at {state['rate']:.2f} req/s.")
+                return
+
+            remaining = headers.get("RateLimit-Remaining")
+            reset = headers.get("RateLimit-Reset")
+            if remaining is not None and reset is not None:
+                window = max(float(reset) - now, 1.0)
+                target = int(remaining) * self.safety / window
+                state["rate"] = min(self.max_rate, max(self.min_rate, target))
+            else:
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase_step)
+
+    def log_stats(self):
+        """Log this process's limiter counters."""
+        logger.info(f"Rate limiter stats: {self.stats}")
+
+def parse_retry_after(value, now):
+    """Return the Retry-After delay in seconds; the header may be seconds or an HTTP date."""
+    if not value:
+        return 1.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return max(parsedate_to_datetime(value).timestamp() - now, 0.0)
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token before each request and feeds the response back to the limiter."""
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        response = super().send(request, **kwargs)
+        self.limiter.update(response)
+        return response
+
+def mount_rate_limiter(http_session, limiter, pool_size=10):
+    """Route every request of a requests session through the limiter."""
+    adapter = RateLimitedAdapter(limiter, pool_connections=pool_size, pool_maxsize=pool_size)
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+    return http_session